@@ -35,7 +35,7 @@ def main() -> int:
         f"{len(plan.images_to_keep)} to keep"
     )
 
-    errors = execute_plan(registry, plan, images, settings.DRY_RUN)
+    errors = execute_plan(registry, plan, settings.DRY_RUN, settings.DELETE_CONCURRENCY)
 
     write_summary(plan, errors, settings)
 
@@ -1,15 +1,96 @@
 from __future__ import annotations
 
+import sys
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, TYPE_CHECKING
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 if TYPE_CHECKING:
     from container_registry_cleanup.settings import Settings
 
 
-@dataclass
+HTTP_POOL_SIZE = 32
+PAGE_SIZE = 100
+
+
+class _RateLimitRetry(Retry):
+    """Retry that also waits out a 403 carrying Retry-After.
+
+    GitHub answers its secondary rate limit with 403 rather than 429.
+    """
+
+    RETRY_AFTER_STATUS_CODES = Retry.RETRY_AFTER_STATUS_CODES | {403}
+
+
+def create_session() -> requests.Session:
+    """Create an HTTP session shared by all requests of a registry client.
+
+    Reusing one pooled session keeps connections (and their TLS handshakes) alive
+    across calls, including calls made from worker threads. Idempotent requests are
+    retried with backoff on rate limiting and transient server errors. A 403 that
+    carries Retry-After is retried after that delay.
+    """
+    retry = _RateLimitRetry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "DELETE"}),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_pages(
+    get_page: Callable[[int], requests.Response],
+    first_page: requests.Response,
+    last_page: int | None,
+    max_workers: int,
+) -> list[Any]:
+    """Return the JSON body of every page of a paginated listing, in page order.
+
+    When the page count is known up front, the remaining pages are fetched
+    concurrently. Otherwise pages are read one by one while the previous one has a
+    rel="next" link or came back full, so a proxy that strips the Link header cannot
+    silently truncate the listing.
+    """
+    pages = [first_page.json()]
+    if last_page is not None:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            pages.extend(
+                response.json()
+                for response in pool.map(get_page, range(2, last_page + 1))
+            )
+        return pages
+
+    response, page = first_page, 1
+    while "next" in response.links or len(pages[-1]) == PAGE_SIZE:
+        page += 1
+        response = get_page(page)
+        pages.append(response.json())
+    return pages
+
+
+def intern_tags(names: Iterable[str]) -> tuple[str, ...]:
+    """Return tag names as a tuple, sharing one string object per distinct name.
+
+    Names like "latest" or "main" repeat across the versions of a repository.
+    """
+    return tuple(sys.intern(name) for name in names)
+
+
+@dataclass(slots=True)
 class ImageVersion:
     """Container image version/artifact.
 
@@ -18,9 +99,16 @@ class ImageVersion:
     """
 
     identifier: str
-    tags: list[str]
+    tags: tuple[str, ...]
     created_at: datetime
     metadata: dict[str, Any] = field(default_factory=dict)
+    short_id: str = field(init=False, repr=False, compare=False)
+    created_at_ts: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.short_id = self.identifier[:12]
+        # Epoch seconds, so ages can be computed with integer arithmetic.
+        self.created_at_ts = int(self.created_at.timestamp())
 
 
 class RegistryClient(ABC):
@@ -1,8 +1,10 @@
 """Core logic for container registry cleanup."""
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from re import Pattern
+from typing import Literal
 
 import requests
 from loguru import logger
@@ -11,55 +13,83 @@ from container_registry_cleanup.base import ImageVersion, RegistryClient
 from container_registry_cleanup.settings import Settings
 
 
+@dataclass(slots=True)
+class ImageDecision:
+    """The planned action for one image and why it was chosen."""
+
+    image: ImageVersion
+    action: Literal["delete", "keep"]
+    reason: str
+
+
 @dataclass
 class DeletionPlan:
-    images_to_delete: list[tuple[ImageVersion, str]]
-    images_to_keep: list[tuple[ImageVersion, str]]
+    images_to_delete: list[ImageDecision]
+    images_to_keep: list[ImageDecision]
 
     def count_kept_tags(self) -> int:
         """Count tags in images that are being kept."""
-        return sum(len(img.tags) for img, _ in self.images_to_keep)
+        return sum(len(decision.image.tags) for decision in self.images_to_keep)
 
     def count_deleted_tags(self) -> int:
         """Count tags in images being deleted."""
-        return sum(len(img.tags) for img, _ in self.images_to_delete)
+        return sum(len(decision.image.tags) for decision in self.images_to_delete)
+
+
+def _tag_kind(
+    tag_name: str, version_pattern: Pattern[str], test_pattern: Pattern[str]
+) -> str | None:
+    """Classify a tag as "version", "test" or None (other)."""
+    if version_pattern.match(tag_name):
+        return "version"
+    if test_pattern.match(tag_name):
+        return "test"
+    return None
+
+
+# Reason labels for tag kinds that are subject to a retention window.
+_TAG_LABELS: dict[str | None, str] = {"test": "test tag", None: "other tag"}
+
+
+def _retention_days(
+    kind: str | None, others_retention_days: int, test_retention_days: int
+) -> int:
+    """Pick the retention window that applies to a non-version tag kind."""
+    return test_retention_days if kind == "test" else others_retention_days
 
 
-def _evaluate_tag(
-    tag_name: str,
-    created_at: datetime,
+def _should_delete_tag(
+    kind: str | None,
+    age_days: int,
     others_retention_days: int,
     test_retention_days: int,
-    version_pattern: Pattern[str],
-    test_pattern: Pattern[str],
-) -> tuple[bool, str]:
-    """Determine if a tag should be deleted. Returns (should_delete, reason)."""
-    age_days = (datetime.now(UTC) - created_at).days
+) -> bool:
+    """Determine if a tag of the given kind and age should be deleted."""
+    if kind == "version":
+        return False
+    retention_days = _retention_days(kind, others_retention_days, test_retention_days)
+    return retention_days == 0 or age_days > retention_days
 
-    if version_pattern.match(tag_name):
-        return False, f"version tag (protected, {age_days}d old)"
 
-    if test_pattern.match(tag_name):
-        if test_retention_days == 0:
-            return True, f"test tag (retention=0d, {age_days}d old)"
-        return (
-            age_days > test_retention_days,
-            f"test tag >{test_retention_days}d ({age_days}d old)",
-        )
+def _tag_reason(
+    kind: str | None,
+    age_days: int,
+    others_retention_days: int,
+    test_retention_days: int,
+) -> str:
+    """Describe the retention decision for a tag of the given kind and age."""
+    if kind == "version":
+        return f"version tag (protected, {age_days}d old)"
 
-    if others_retention_days == 0:
-        return True, f"other tag (retention=0d, {age_days}d old)"
-    return (
-        age_days > others_retention_days,
-        f"other tag >{others_retention_days}d ({age_days}d old)",
-    )
+    label = _TAG_LABELS[kind]
+    retention_days = _retention_days(kind, others_retention_days, test_retention_days)
+    if retention_days == 0:
+        return f"{label} (retention=0d, {age_days}d old)"
+    return f"{label} >{retention_days}d ({age_days}d old)"
 
 
-def _evaluate_untagged(
-    created_at: datetime, others_retention_days: int
-) -> tuple[bool, str]:
+def _evaluate_untagged(age_days: int, others_retention_days: int) -> tuple[bool, str]:
     """Determine if an untagged image should be deleted. Returns (should_delete, reason)."""
-    age_days = (datetime.now(UTC) - created_at).days
     if others_retention_days == 0:
         return True, f"untagged (retention=0d, {age_days}d old)"
     return (
@@ -73,12 +103,24 @@ def create_deletion_plan(
 ) -> DeletionPlan:
     version_pattern = settings.compiled_version_pattern
     test_pattern = settings.compiled_test_pattern
+    others_retention_days = settings.OTHERS_RETENTION_DAYS
+    test_retention_days = settings.TEST_RETENTION_DAYS
+    debug = settings.DEBUG
+    # Images no older than both retention windows keep every tag, whatever its kind.
+    min_retention_days = min(others_retention_days, test_retention_days)
+    # Evaluate every image against the same reference time.
+    now_ts = int(datetime.now(UTC).timestamp())
     plan = DeletionPlan(images_to_delete=[], images_to_keep=[])
+    # Bound once to avoid attribute lookups on every appended entry.
+    keep = plan.images_to_keep.append
+    delete = plan.images_to_delete.append
+    # Tags like "latest" or "main" repeat across versions; classify each name once per run.
+    tag_kinds: dict[str, str | None] = {}
 
     for image in images:
-        img_id = (
-            image.identifier[:12] if len(image.identifier) > 12 else image.identifier
-        )
+        img_id = image.short_id
+        # The age only depends on the image, so compute it once for all of its tags.
+        age_days = (now_ts - image.created_at_ts) // 86400
 
         protected_by_reference = bool(
             image.metadata.get("protected_by_tag_or_index", False)
@@ -88,52 +130,61 @@ def create_deletion_plan(
         )
 
         if not image.tags:
-            should_delete, reason = _evaluate_untagged(
-                image.created_at, settings.OTHERS_RETENTION_DAYS
-            )
+            should_delete, reason = _evaluate_untagged(age_days, others_retention_days)
             if protected_by_reference:
                 keep_reason = f"{reason}; protected_by_reference ({protected_reason})"
                 logger.info(f"UNTAGGED: KEEP - {keep_reason}")
-                logger.debug(f"[{img_id}] KEEP: {keep_reason}")
-                plan.images_to_keep.append((image, keep_reason))
+                logger.debug("[{}] KEEP: {}", img_id, keep_reason)
+                keep(ImageDecision(image, "keep", keep_reason))
             elif should_delete:
                 delete_reason = f"{reason}; not_protected_by_reference"
                 logger.info(f"UNTAGGED: DELETE - {delete_reason}")
-                logger.debug(f"[{img_id}] DELETE: {delete_reason}")
-                plan.images_to_delete.append((image, delete_reason))
+                logger.debug("[{}] DELETE: {}", img_id, delete_reason)
+                delete(ImageDecision(image, "delete", delete_reason))
             else:
                 keep_reason = f"{reason}; not_protected_by_reference"
-                logger.debug(f"[{img_id}] KEEP: {keep_reason}")
-                plan.images_to_keep.append((image, keep_reason))
+                logger.debug("[{}] KEEP: {}", img_id, keep_reason)
+                keep(ImageDecision(image, "keep", keep_reason))
+            continue
+
+        if not debug and min_retention_days > 0 and age_days <= min_retention_days:
+            logger.debug("[{}] KEEP: {}", img_id, "has_tags_to_keep")
+            keep(ImageDecision(image, "keep", "has_tags_to_keep"))
             continue
 
-        tag_decisions = []
+        has_tag_to_keep = False
         for tag in image.tags:
-            should_delete, reason = _evaluate_tag(
-                tag,
-                image.created_at,
-                settings.OTHERS_RETENTION_DAYS,
-                settings.TEST_RETENTION_DAYS,
-                version_pattern,
-                test_pattern,
+            if tag not in tag_kinds:
+                tag_kinds[tag] = _tag_kind(tag, version_pattern, test_pattern)
+            kind = tag_kinds[tag]
+            should_delete = _should_delete_tag(
+                kind, age_days, others_retention_days, test_retention_days
             )
-            tag_decisions.append((tag, should_delete, reason))
-            logger.debug(
-                f"[{img_id}] tag '{tag}': {'DELETE' if should_delete else 'KEEP'} - {reason}"
-            )
-
-        has_tag_to_keep = any(
-            not should_delete for _, should_delete, _ in tag_decisions
-        )
+            # Per-tag reasons are only read in debug logs, so only build them there.
+            if debug:
+                logger.debug(
+                    "[{}] tag '{}': {} - {}",
+                    img_id,
+                    tag,
+                    "DELETE" if should_delete else "KEEP",
+                    _tag_reason(
+                        kind, age_days, others_retention_days, test_retention_days
+                    ),
+                )
+            if not should_delete:
+                has_tag_to_keep = True
+                # One kept tag keeps the whole image; debug mode still logs every tag.
+                if not debug:
+                    break
 
         if has_tag_to_keep:
             keep_reason = "has_tags_to_keep"
-            logger.debug(f"[{img_id}] KEEP: {keep_reason}")
-            plan.images_to_keep.append((image, keep_reason))
+            logger.debug("[{}] KEEP: {}", img_id, keep_reason)
+            keep(ImageDecision(image, "keep", keep_reason))
         else:
             delete_reason = "all_tags_expired"
-            logger.debug(f"[{img_id}] DELETE: {delete_reason}")
-            plan.images_to_delete.append((image, delete_reason))
+            logger.debug("[{}] DELETE: {}", img_id, delete_reason)
+            delete(ImageDecision(image, "delete", delete_reason))
 
     return plan
 
@@ -141,8 +192,8 @@ def create_deletion_plan(
 def execute_plan(
     registry: RegistryClient,
     plan: DeletionPlan,
-    images: list[ImageVersion],
     dry_run: bool,
+    concurrency: int = 1,
 ) -> int:
     if not plan.images_to_delete:
         logger.info("No images to delete")
@@ -155,18 +206,33 @@ def execute_plan(
     logger.info("PERFORMING DELETIONS...")
     deleted = errors = 0
 
-    for image, reason in plan.images_to_delete:
-        try:
-            registry.delete_image(image)
-            deleted += 1
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error deleting image {image.identifier[:20]}...: {e}")
-            errors += 1
+    # Each deletion is an independent HTTP round-trip, so run them concurrently.
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(registry.delete_image, decision.image): decision.image
+            for decision in plan.images_to_delete
+        }
+        for future in as_completed(futures):
+            image = futures[future]
+            try:
+                future.result()
+                deleted += 1
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error deleting image {image.identifier[:20]}...: {e}")
+                errors += 1
 
     logger.info(f"Deleted: {deleted} images, {errors} errors")
     return errors
 
 
+def _format_summary_entries(entries: list[ImageDecision]) -> str:
+    """Render plan entries as Markdown list items in one string."""
+    return "".join(
+        f"- `{d.image.short_id}` — {', '.join(d.image.tags) or 'untagged'} — _{d.reason}_\n"
+        for d in entries
+    )
+
+
 def write_summary(plan: DeletionPlan, errors: int, settings: Settings) -> None:
     """Write cleanup summary to GitHub Actions step summary."""
     if not settings.GITHUB_STEP_SUMMARY:
@@ -174,43 +240,38 @@ def write_summary(plan: DeletionPlan, errors: int, settings: Settings) -> None:
 
     deleted_images = len(plan.images_to_delete)
     deleted_tags = plan.count_deleted_tags()
+    kept_tags = plan.count_kept_tags()
     action = "To Delete" if settings.DRY_RUN else "Deleted"
     mode = "Dry Run" if settings.DRY_RUN else "Live"
 
-    with open(settings.GITHUB_STEP_SUMMARY, "w") as f:
-        f.write(
-            f"### Container Image Cleanup\n\n"
-            f"| Metric | Count |\n"
-            f"|--------|-------|\n"
-            f"| Kept | {plan.count_kept_tags()} |\n"
-            f"| {action} (images) | {deleted_images} |\n"
-            f"| {action} (tags) | {deleted_tags} |\n"
-            f"| Errors | {errors} |\n\n"
-            f"**Mode:** {mode} | "
-            f"**Retention:** Test={settings.TEST_RETENTION_DAYS}d, "
-            f"Others={settings.OTHERS_RETENTION_DAYS}d\n\n"
+    header = (
+        f"### Container Image Cleanup\n\n"
+        f"| Metric | Count |\n"
+        f"|--------|-------|\n"
+        f"| Kept | {kept_tags} |\n"
+        f"| {action} (images) | {deleted_images} |\n"
+        f"| {action} (tags) | {deleted_tags} |\n"
+        f"| Errors | {errors} |\n\n"
+        f"**Mode:** {mode} | "
+        f"**Retention:** Test={settings.TEST_RETENTION_DAYS}d, "
+        f"Others={settings.OTHERS_RETENTION_DAYS}d\n\n"
+    )
+    # Assemble the whole report first so the file is written in one call.
+    parts = [header]
+
+    if plan.images_to_delete:
+        parts.append(
+            f"<details>\n<summary>{action}: {deleted_images} images ({deleted_tags} tags)</summary>\n\n"
+            f"{_format_summary_entries(plan.images_to_delete)}"
+            "\n</details>\n\n"
         )
 
-        if plan.images_to_delete:
-            f.write(
-                f"<details>\n<summary>{action}: {len(plan.images_to_delete)} images ({plan.count_deleted_tags()} tags)</summary>\n\n"
-            )
-            for img, reason in plan.images_to_delete:
-                img_id = (
-                    img.identifier[:12] if len(img.identifier) > 12 else img.identifier
-                )
-                tags_str = ", ".join(img.tags) if img.tags else "untagged"
-                f.write(f"- `{img_id}` — {tags_str} — _{reason}_\n")
-            f.write("\n</details>\n\n")
+    if plan.images_to_keep:
+        parts.append(
+            f"<details>\n<summary>Kept: {len(plan.images_to_keep)} images ({kept_tags} tags)</summary>\n\n"
+            f"{_format_summary_entries(plan.images_to_keep)}"
+            "\n</details>\n"
+        )
 
-        if plan.images_to_keep:
-            f.write(
-                f"<details>\n<summary>Kept: {len(plan.images_to_keep)} images ({plan.count_kept_tags()} tags)</summary>\n\n"
-            )
-            for img, reason in plan.images_to_keep:
-                img_id = (
-                    img.identifier[:12] if len(img.identifier) > 12 else img.identifier
-                )
-                tags_str = ", ".join(img.tags) if img.tags else "untagged"
-                f.write(f"- `{img_id}` — {tags_str} — _{reason}_\n")
-            f.write("\n</details>\n")
+    with open(settings.GITHUB_STEP_SUMMARY, "w") as f:
+        f.write("".join(parts))
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, cast
+from typing import Any
+from urllib.parse import parse_qs, urlparse
 
 import requests
 from loguru import logger
 from pydantic import BaseModel
 
-from container_registry_cleanup.base import ImageVersion, RegistryClient
+from container_registry_cleanup.base import (
+    PAGE_SIZE,
+    ImageVersion,
+    RegistryClient,
+    create_session,
+    fetch_pages,
+    intern_tags,
+)
 from container_registry_cleanup.settings import Settings
 
 
@@ -20,32 +30,36 @@ class GHCRClient(RegistryClient):
     """GitHub Container Registry client.
 
     Required settings: GITHUB_TOKEN, GITHUB_REPO_OWNER, REPOSITORY_NAME
-    Optional settings: GITHUB_STEP_SUMMARY (GitHub Actions step summary file path)
+    Optional settings: GITHUB_STEP_SUMMARY (GitHub Actions step summary file path),
+      FETCH_CONCURRENCY (parallel page and manifest fetches)
     """
 
     @classmethod
     def from_settings(cls, settings: Settings) -> GHCRClient:
-        import os
-
         if not settings.REPOSITORY_NAME:
             raise ValueError("Missing required GHCR setting: REPOSITORY_NAME")
 
+        # Only pass the keys the model needs; settings take precedence over the env.
         data = {
-            **os.environ,
-            **{
-                k: v
-                for k in ["GITHUB_TOKEN", "GITHUB_REPO_OWNER"]
-                if (v := getattr(settings, k, None))
-            },
+            k: v
+            for k in GHCRSettings.model_fields
+            if (v := getattr(settings, k, None) or os.environ.get(k))
         }
         ghcr_settings = GHCRSettings.model_validate(data)
         return cls(
             ghcr_settings.GITHUB_TOKEN,
             ghcr_settings.GITHUB_REPO_OWNER,
             settings.REPOSITORY_NAME,
+            max_workers=settings.FETCH_CONCURRENCY,
         )
 
-    def __init__(self, token: str, org_name: str, repository_name: str):
+    def __init__(
+        self,
+        token: str,
+        org_name: str,
+        repository_name: str,
+        max_workers: int = 16,
+    ):
         self.token = token
         self.org_name = org_name
         self.repository_name = repository_name
@@ -54,56 +68,61 @@ class GHCRClient(RegistryClient):
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
+        self.session = create_session()
+        self.session.headers.update(self.headers)
+        self.max_workers = max_workers
 
     def list_images(self) -> list[ImageVersion]:
-        all_images: list[ImageVersion] = []
-        page = 1
-
-        while True:
-            url = f"https://api.github.com/orgs/{self.org_name}/packages/container/{self.repository_name}/versions"
-            params: dict[str, str | int] = {
-                "page": page,
-                "per_page": 100,
-                "state": "active",
-            }
-
-            response = requests.get(
-                url, headers=self.headers, params=params, timeout=30
-            )
-            response.raise_for_status()
-
-            versions = response.json()
-            if not versions:
-                break
-
-            for version in versions:
-                version_id = str(version.get("id", ""))
-                created_at_str = version.get("created_at", "")
-                metadata = version.get("metadata", {})
-                container_metadata = metadata.get("container", {})
-                tags = container_metadata.get("tags", [])
-
-                created_at = datetime.fromisoformat(
-                    created_at_str.replace("Z", "+00:00")
-                )
-
-                all_images.append(
-                    ImageVersion(
-                        identifier=version_id,
-                        tags=tags,
-                        created_at=created_at,
-                        metadata={"version": version},
-                    )
-                )
-
-            page += 1
+        first_page = self._get_versions_page(1)
+        pages = fetch_pages(
+            self._get_versions_page,
+            first_page,
+            self._last_page_number(first_page),
+            self.max_workers,
+        )
 
+        all_images = [
+            self._to_image_version(version)
+            for versions in pages
+            for version in versions
+        ]
         self._annotate_oci_references(all_images)
         return all_images
 
+    def _get_versions_page(self, page: int) -> requests.Response:
+        url = f"https://api.github.com/orgs/{self.org_name}/packages/container/{self.repository_name}/versions"
+        params: dict[str, str | int] = {
+            "page": page,
+            "per_page": PAGE_SIZE,
+            "state": "active",
+        }
+        response = self.session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _last_page_number(response: requests.Response) -> int | None:
+        """Read the page count from the `Link: <...>; rel="last"` header, if present."""
+        last_url = response.links.get("last", {}).get("url")
+        if not last_url:
+            return None
+        page = parse_qs(urlparse(last_url).query).get("page")
+        return int(page[0]) if page else None
+
+    @staticmethod
+    def _to_image_version(version: dict[str, Any]) -> ImageVersion:
+        metadata = version.get("metadata", {})
+        container_metadata = metadata.get("container", {})
+        return ImageVersion(
+            identifier=str(version.get("id", "")),
+            tags=intern_tags(container_metadata.get("tags", [])),
+            created_at=datetime.fromisoformat(version.get("created_at", "")),
+            metadata={"version": version},
+        )
+
     def delete_image(self, image: ImageVersion) -> None:
         url = f"https://api.github.com/orgs/{self.org_name}/packages/container/{self.repository_name}/versions/{image.identifier}"
-        response = requests.delete(url, headers=self.headers, timeout=30)
+        response = self.session.delete(url, timeout=30)
         response.raise_for_status()
 
     def delete_tag(self, image: ImageVersion, tag: str) -> None:
@@ -125,19 +144,21 @@ class GHCRClient(RegistryClient):
         mark reachable digests as protected. This prevents deleting untagged manifests
         that are still needed by a tagged OCI index/manifest tree.
         """
-        protected_digests: set[str] = set()
-        visited: set[str] = set()
+        digests: dict[str, str] = {}
+        roots: list[str] = []
 
         for image in images:
             digest = self._extract_digest_from_version_metadata(image.metadata)
             if digest:
-                image.metadata["ghcr_digest"] = digest
-            if image.tags and digest:
-                self._collect_protected_digests(digest, protected_digests, visited)
+                digests[image.identifier] = digest
+                if image.tags:
+                    roots.append(digest)
+
+        protected_digests = self._collect_protected_digests(roots)
 
         for image in images:
-            digest = cast(str | None, image.metadata.get("ghcr_digest"))
-            is_protected = bool(digest and digest in protected_digests)
+            digest = digests.get(image.identifier)
+            is_protected = digest is not None and digest in protected_digests
             image.metadata["protected_by_tag_or_index"] = is_protected
             image.metadata["protected_reason"] = (
                 "reachable_from_tagged_manifest_or_index"
@@ -145,52 +166,59 @@ class GHCRClient(RegistryClient):
                 else "not_referenced_by_any_tagged_root"
             )
 
-    def _collect_protected_digests(
-        self,
-        digest: str,
-        protected_digests: set[str],
-        visited: set[str],
-    ) -> None:
-        if digest in visited:
-            return
-
-        visited.add(digest)
-        protected_digests.add(digest)
-
-        manifest = self._get_manifest(digest)
-        if manifest is None:
-            return
-
-        media_type = str(manifest.get("mediaType", ""))
-
-        # OCI index / Docker manifest list: recurse into child manifests.
-        if self._is_index_media_type(media_type):
-            for child in manifest.get("manifests", []) or []:
-                child_digest = child.get("digest")
-                if isinstance(child_digest, str) and child_digest:
-                    self._collect_protected_digests(
-                        child_digest, protected_digests, visited
+    def _collect_protected_digests(self, roots: list[str]) -> set[str]:
+        """Collect every digest reachable from the given root digests.
+
+        The manifest graph is walked breadth-first; all manifests of one level are
+        fetched concurrently, since each fetch is an independent HTTP round-trip.
+        """
+        protected_digests: set[str] = set()
+        visited: set[str] = set()
+        frontier = list(dict.fromkeys(roots))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            while frontier:
+                visited.update(frontier)
+                protected_digests.update(frontier)
+                children: list[str] = []
+
+                for manifest in pool.map(self._get_manifest, frontier):
+                    if manifest is None:
+                        continue
+
+                    media_type = str(manifest.get("mediaType", ""))
+
+                    # OCI index / Docker manifest list: descend into child manifests.
+                    if self._is_index_media_type(media_type):
+                        children.extend(
+                            digest
+                            for child in manifest.get("manifests", []) or []
+                            if isinstance(digest := child.get("digest"), str) and digest
+                        )
+                        continue
+
+                    # Single manifest: protect config + layers blobs in one pass.
+                    blobs = [
+                        manifest.get("config"),
+                        *(manifest.get("layers", []) or []),
+                    ]
+                    protected_digests.update(
+                        digest
+                        for blob in blobs
+                        if isinstance(blob, dict)
+                        and isinstance(digest := blob.get("digest"), str)
+                        and digest
                     )
-            return
 
-        # Single manifest: protect config + layers blobs.
-        config = manifest.get("config")
-        if isinstance(config, dict):
-            cfg_digest = config.get("digest")
-            if isinstance(cfg_digest, str) and cfg_digest:
-                protected_digests.add(cfg_digest)
+                frontier = [d for d in dict.fromkeys(children) if d not in visited]
 
-        for layer in manifest.get("layers", []) or []:
-            if isinstance(layer, dict):
-                layer_digest = layer.get("digest")
-                if isinstance(layer_digest, str) and layer_digest:
-                    protected_digests.add(layer_digest)
+        return protected_digests
 
     def _get_manifest(self, digest: str) -> dict[str, Any] | None:
         """Fetch manifest/index JSON for a digest from GHCR v2 API."""
         url = f"https://ghcr.io/v2/{self.org_name}/{self.repository_name}/manifests/{digest}"
+        # Authorization comes from the session; only the Accept header differs here.
         headers = {
-            "Authorization": f"Bearer {self.token}",
             "Accept": ",".join(
                 [
                     "application/vnd.oci.image.index.v1+json",
@@ -201,7 +229,7 @@ class GHCRClient(RegistryClient):
             ),
         }
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
 
             if response.status_code == 404:
                 return None
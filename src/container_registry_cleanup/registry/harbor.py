@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import os
+from collections.abc import Iterator
 from datetime import UTC, datetime
 from typing import Any
 
 import requests
-from dateutil import parser as date_parser  # type: ignore[import-untyped]
 from pydantic import BaseModel
 
-from container_registry_cleanup.base import ImageVersion, RegistryClient
+from container_registry_cleanup.base import (
+    PAGE_SIZE,
+    ImageVersion,
+    RegistryClient,
+    create_session,
+    fetch_pages,
+    intern_tags,
+)
 from container_registry_cleanup.settings import Settings
 
 
@@ -27,6 +35,7 @@ class HarborClient(RegistryClient):
       HARBOR_PASSWORD,
       HARBOR_PROJECT_NAME,
       REPOSITORY_NAME
+    Optional settings: FETCH_CONCURRENCY (parallel page fetches)
     """
 
     @classmethod
@@ -36,18 +45,19 @@ class HarborClient(RegistryClient):
         Harbor-specific settings (HARBOR_URL, HARBOR_USERNAME, HARBOR_PASSWORD,
         HARBOR_PROJECT_NAME) are read from environment variables.
         """
-        import os
-
         if not settings.REPOSITORY_NAME:
             raise ValueError("Missing required Harbor setting: REPOSITORY_NAME")
 
-        harbor_settings = HarborSettings.model_validate(os.environ)
+        harbor_settings = HarborSettings.model_validate(
+            {k: os.environ[k] for k in HarborSettings.model_fields if k in os.environ}
+        )
         return cls(
             harbor_settings.HARBOR_URL,
             harbor_settings.HARBOR_USERNAME,
             harbor_settings.HARBOR_PASSWORD,
             harbor_settings.HARBOR_PROJECT_NAME,
             settings.REPOSITORY_NAME,
+            max_workers=settings.FETCH_CONCURRENCY,
         )
 
     def __init__(
@@ -57,6 +67,7 @@ class HarborClient(RegistryClient):
         password: str,
         project_name: str,
         repository_name: str,
+        max_workers: int = 16,
     ):
         self.harbor_url = harbor_url.rstrip("/")
         if not self.harbor_url.startswith("http"):
@@ -66,65 +77,81 @@ class HarborClient(RegistryClient):
         self.project_name = project_name
         self.repository_name = repository_name
         self.auth = (username, password)
+        self.session = create_session()
+        self.session.auth = self.auth
+        self.max_workers = max_workers
 
     def _get_api_url(self, path: str) -> str:
         return f"{self.harbor_url}/api/v2.0{path}"
 
     def list_images(self) -> list[ImageVersion]:
-        url = self._get_api_url(
-            f"/projects/{self.project_name}/repositories/{self.repository_name}/artifacts"
+        first_page = self._get_artifacts_page(1)
+        pages = fetch_pages(
+            self._get_artifacts_page,
+            first_page,
+            self._last_page_number(first_page),
+            self.max_workers,
         )
-        params: dict[str, Any] = {"page_size": 100, "with_tag": "true"}
-
-        all_images = []
-        page = 1
-
-        while True:
-            params["page"] = page
-            response = requests.get(url, params=params, auth=self.auth, timeout=30)
-            response.raise_for_status()
-
-            artifacts = response.json()
-            if not artifacts:
-                break
-
-            for artifact in artifacts:
-                digest = artifact.get("digest", "")
-                push_time = artifact.get("push_time")
-                tags = artifact.get("tags") or []
 
-                tag_names = [tag.get("name") for tag in tags if tag.get("name")]
+        return [
+            image for artifacts in pages for image in self._to_image_versions(artifacts)
+        ]
 
-                created_at = self._parse_time(push_time)
-
-                all_images.append(
-                    ImageVersion(
-                        identifier=digest,
-                        tags=tag_names,
-                        created_at=created_at,
-                        metadata={"artifact": artifact},
-                    )
-                )
-
-            page += 1
+    def _get_artifacts_page(self, page: int) -> requests.Response:
+        url = self._get_api_url(
+            f"/projects/{self.project_name}/repositories/{self.repository_name}/artifacts"
+        )
+        params: dict[str, Any] = {
+            "page": page,
+            "page_size": PAGE_SIZE,
+            "with_tag": "true",
+        }
+        response = self.session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        return response
 
-        return all_images
+    @staticmethod
+    def _last_page_number(response: requests.Response) -> int | None:
+        """Derive the page count from the `X-Total-Count` header, if present."""
+        total_count = response.headers.get("X-Total-Count")
+        if total_count is None:
+            return None
+        return -(-int(total_count) // PAGE_SIZE)
+
+    def _to_image_versions(self, artifacts: list[Any]) -> Iterator[ImageVersion]:
+        for artifact in artifacts:
+            digest = artifact.get("digest", "")
+            push_time = artifact.get("push_time")
+            tags = artifact.get("tags") or []
+
+            tag_names = intern_tags(name for tag in tags if (name := tag.get("name")))
+
+            created_at = self._parse_time(push_time)
+
+            yield ImageVersion(
+                identifier=digest,
+                tags=tag_names,
+                created_at=created_at,
+                metadata={"artifact": artifact},
+            )
 
     def delete_image(self, image: ImageVersion) -> None:
         url = self._get_api_url(
             f"/projects/{self.project_name}/repositories/{self.repository_name}/artifacts/{image.identifier}"
         )
-        response = requests.delete(url, auth=self.auth, timeout=30)
+        response = self.session.delete(url, timeout=30)
         response.raise_for_status()
 
     def delete_tag(self, image: ImageVersion, tag: str) -> None:
         url = self._get_api_url(
             f"/projects/{self.project_name}/repositories/{self.repository_name}/artifacts/{image.identifier}/tags/{tag}"
         )
-        response = requests.delete(url, auth=self.auth, timeout=30)
+        response = self.session.delete(url, timeout=30)
         response.raise_for_status()
 
     @staticmethod
     def _parse_time(time_str: str | datetime) -> datetime:
-        parsed = date_parser.parse(time_str) if isinstance(time_str, str) else time_str
+        parsed = (
+            datetime.fromisoformat(time_str) if isinstance(time_str, str) else time_str
+        )
         return parsed.replace(tzinfo=UTC) if parsed.tzinfo is None else parsed
@@ -1,8 +1,15 @@
 import re
-from typing import Pattern
+from functools import cached_property
+from typing import Any, Pattern
 
 from pydantic_settings import BaseSettings
 
+# Pattern fields and the cached_property that holds each one compiled.
+_COMPILED_PATTERNS = {
+    "VERSION_PATTERN": "compiled_version_pattern",
+    "TEST_PATTERN": "compiled_test_pattern",
+}
+
 
 class Settings(BaseSettings):
     REGISTRY_TYPE: str = ""
@@ -14,14 +21,23 @@ class Settings(BaseSettings):
     TEST_RETENTION_DAYS: int = 30
     OTHERS_RETENTION_DAYS: int = 7
 
+    FETCH_CONCURRENCY: int = 16
+    DELETE_CONCURRENCY: int = 16
+
     DRY_RUN: bool = True
     DEBUG: bool = False
     GITHUB_STEP_SUMMARY: str | None = None
 
-    @property
+    @cached_property
     def compiled_version_pattern(self) -> Pattern[str]:
         return re.compile(self.VERSION_PATTERN)
 
-    @property
+    @cached_property
     def compiled_test_pattern(self) -> Pattern[str]:
         return re.compile(self.TEST_PATTERN)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Drop the stale compiled regex; the next access recompiles it.
+        if name in _COMPILED_PATTERNS:
+            self.__dict__.pop(_COMPILED_PATTERNS[name], None)
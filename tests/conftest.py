@@ -0,0 +1,36 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+from container_registry_cleanup.settings import Settings
+
+
+@pytest.fixture(scope="session")
+def default_settings() -> Settings:
+    """Build Settings from the environment once per test session."""
+    return Settings()
+
+
+@pytest.fixture
+def settings(default_settings: Settings) -> Settings:
+    """Give each test its own Settings, built from the session values, to mutate."""
+    return Settings(**default_settings.model_dump())
+
+
+@pytest.fixture
+def ghcr_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Provide the GHCR credentials that GHCRClient.from_settings reads."""
+    for key, value in {"GITHUB_TOKEN": "token", "GITHUB_REPO_OWNER": "org"}.items():
+        monkeypatch.setenv(key, value)
+
+
+@pytest.fixture
+def harbor_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Provide the Harbor settings that HarborClient.from_settings reads."""
+    for key, value in {
+        "HARBOR_URL": "harbor.example.com",
+        "HARBOR_USERNAME": "user",
+        "HARBOR_PASSWORD": "pass",
+        "HARBOR_PROJECT_NAME": "proj",
+    }.items():
+        monkeypatch.setenv(key, value)
@@ -1,28 +1,29 @@
 """Tests for logic module."""
 
-import sys
 from datetime import UTC, datetime, timedelta
-from pathlib import Path
+from re import Pattern
 from typing import Any, cast
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import pytest
 import requests
 
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 from container_registry_cleanup.base import ImageVersion
 from container_registry_cleanup.logic import (
-    _evaluate_tag as evaluate_tag,
-    _evaluate_untagged as evaluate_untagged,
+    ImageDecision,
+    _should_delete_tag,
+    _tag_kind,
+    _tag_reason,
     create_deletion_plan,
     execute_plan,
 )
+from container_registry_cleanup.logic import _evaluate_untagged as evaluate_untagged
 from container_registry_cleanup.settings import Settings
 
 
 def _image_with_protection(
     identifier: str,
-    tags: list[str],
+    tags: tuple[str, ...],
     created_at: datetime,
     *,
     protected: bool,
@@ -34,86 +35,48 @@ def _image_with_protection(
     return img
 
 
+@pytest.fixture(scope="module")
+def tag_patterns(default_settings: Settings) -> tuple[Pattern[str], Pattern[str]]:
+    """Compile the default version and test patterns once for the whole module."""
+    return (
+        default_settings.compiled_version_pattern,
+        default_settings.compiled_test_pattern,
+    )
+
+
 class TestRetentionLogic:
-    def setup_method(self) -> None:
-        s = Settings()
-        self.vp = s.compiled_version_pattern
-        self.tp = s.compiled_test_pattern
+    @pytest.fixture(autouse=True)
+    def _use_tag_patterns(
+        self, tag_patterns: tuple[Pattern[str], Pattern[str]]
+    ) -> None:
+        self.patterns = tag_patterns
 
     def test_version_tag_never_deleted(self) -> None:
-        should_delete, reason = evaluate_tag(
-            "v1.0.0",
-            datetime.now(UTC) - timedelta(days=365),
-            7,
-            30,
-            self.vp,
-            self.tp,
-        )
-        assert not should_delete
-        assert "version tag" in reason
+        kind = _tag_kind("v1.0.0", *self.patterns)
+        assert kind == "version"
+        assert not _should_delete_tag(kind, 365, 7, 30)
+        assert "version tag" in _tag_reason(kind, 365, 7, 30)
 
     def test_test_tag_retention(self) -> None:
-        now = datetime.now(UTC)
-        should_delete_old, reason_old = evaluate_tag(
-            "pr-123", now - timedelta(days=35), 7, 30, self.vp, self.tp
-        )
-        should_delete_new, reason_new = evaluate_tag(
-            "pr-123", now - timedelta(days=10), 7, 30, self.vp, self.tp
-        )
-        assert should_delete_old
-        assert reason_old == "test tag >30d (35d old)"
-        assert not should_delete_new
-        assert reason_new == "test tag >30d (10d old)"
-
-    def test_other_tag_retention(self) -> None:
-        now = datetime.now(UTC)
-
-        old_other_tag, reason = evaluate_tag(
-            "dev", now - timedelta(days=10), 7, 30, self.vp, self.tp
-        )
-        assert old_other_tag
-        assert reason == "other tag >7d (10d old)"
-
-        recent_other_tag, reason = evaluate_tag(
-            "main", now - timedelta(days=3), 7, 30, self.vp, self.tp
-        )
-        assert not recent_other_tag
-        assert reason == "other tag >7d (3d old)"
-
-        old_sha_tag, reason = evaluate_tag(
-            "sha-abc123", now - timedelta(days=10), 7, 30, self.vp, self.tp
-        )
-        assert old_sha_tag
-        assert reason == "other tag >7d (10d old)"
-
-        recent_sha_tag, reason = evaluate_tag(
-            "sha-abc123", now - timedelta(days=3), 7, 30, self.vp, self.tp
-        )
-        assert not recent_sha_tag
-        assert reason == "other tag >7d (3d old)"
-
-    def test_unknown_tag_uses_other_retention(self) -> None:
-        now = datetime.now(UTC)
-
-        old_unknown_tag, reason = evaluate_tag(
-            "random-tag", now - timedelta(days=10), 7, 30, self.vp, self.tp
-        )
-        assert old_unknown_tag
-        assert reason == "other tag >7d (10d old)"
-
-        recent_unknown_tag, reason = evaluate_tag(
-            "random-tag", now - timedelta(days=3), 7, 30, self.vp, self.tp
-        )
-        assert not recent_unknown_tag
-        assert reason == "other tag >7d (3d old)"
+        kind = _tag_kind("pr-123", *self.patterns)
+        assert kind == "test"
+        assert _should_delete_tag(kind, 35, 7, 30)
+        assert _tag_reason(kind, 35, 7, 30) == "test tag >30d (35d old)"
+        assert not _should_delete_tag(kind, 10, 7, 30)
+        assert _tag_reason(kind, 10, 7, 30) == "test tag >30d (10d old)"
+
+    @pytest.mark.parametrize("tag", ["dev", "main", "sha-abc123", "random-tag"])
+    def test_other_tag_retention(self, tag: str) -> None:
+        kind = _tag_kind(tag, *self.patterns)
+        assert kind is None
+        assert _should_delete_tag(kind, 10, 7, 30)
+        assert _tag_reason(kind, 10, 7, 30) == "other tag >7d (10d old)"
+        assert not _should_delete_tag(kind, 3, 7, 30)
+        assert _tag_reason(kind, 3, 7, 30) == "other tag >7d (3d old)"
 
     def test_untagged_retention(self) -> None:
-        now = datetime.now(UTC)
-        old_untagged = now - timedelta(days=10)
-        new_untagged = now - timedelta(days=3)
-
-        should_delete_old, reason_old = evaluate_untagged(old_untagged, 7)
-        should_delete_new, reason_new = evaluate_untagged(new_untagged, 7)
+        should_delete_old, reason_old = evaluate_untagged(10, 7)
+        should_delete_new, reason_new = evaluate_untagged(3, 7)
 
         assert should_delete_old
         assert reason_old == "untagged >7d (10d old)"
@@ -122,21 +85,37 @@ class TestRetentionLogic:
 
     def test_retention_zero_immediate_deletion(self) -> None:
         """Test that retention=0 causes immediate deletion."""
-        now = datetime.now(UTC)
         # Even a brand new tag should be deleted if retention is 0
-        should_delete_tag, reason_tag = evaluate_tag(
-            "dev", now, 0, 30, self.vp, self.tp
-        )
-        should_delete_untagged, reason_untagged = evaluate_untagged(now, 0)
-        assert should_delete_tag
-        assert reason_tag == "other tag (retention=0d, 0d old)"
+        kind = _tag_kind("dev", *self.patterns)
+        should_delete_untagged, reason_untagged = evaluate_untagged(0, 0)
+        assert _should_delete_tag(kind, 0, 0, 30)
+        assert _tag_reason(kind, 0, 0, 30) == "other tag (retention=0d, 0d old)"
         assert should_delete_untagged
         assert reason_untagged == "untagged (retention=0d, 0d old)"
 
+    def test_tag_kind(self) -> None:
+        assert _tag_kind("v1.0.0", *self.patterns) == "version"
+        assert _tag_kind("latest", *self.patterns) == "version"
+        assert _tag_kind("pr-123", *self.patterns) == "test"
+        assert _tag_kind("dev", *self.patterns) is None
+        assert _tag_kind("pr-abc", *self.patterns) is None
+
+    def test_tag_kind_user_patterns_match_independently(self) -> None:
+        """Inline flags, backreferences and group names keep their own meaning."""
+        settings = Settings(
+            VERSION_PATTERN=r"(?i)^(?P<version>v?\d+\.\d+\.\d+.*|latest)$",
+            TEST_PATTERN=r"^(pr|mr)-\d+-\1$",
+        )
+        patterns = (settings.compiled_version_pattern, settings.compiled_test_pattern)
+        assert _tag_kind("LATEST", *patterns) == "version"
+        assert _tag_kind("pr-12-pr", *patterns) == "test"
+        assert _tag_kind("pr-12-mr", *patterns) is None
+
 
 class TestDeletionPlan:
-    def setup_method(self) -> None:
-        self.settings = Settings()
+    @pytest.fixture(autouse=True)
+    def _use_settings(self, settings: Settings) -> None:
+        self.settings = settings
         # Explicitly set retention days to avoid environment variable interference
         self.settings.OTHERS_RETENTION_DAYS = 7
         self.settings.TEST_RETENTION_DAYS = 30
@@ -144,7 +123,7 @@ class TestDeletionPlan:
     def test_create_plan_all_tags_expired(self) -> None:
         """Image with all tags expired should be deleted entirely."""
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", ["dev", "main"], now - timedelta(days=10))]
+        images = [ImageVersion("img1", ("dev", "main"), now - timedelta(days=10))]
         plan = create_deletion_plan(images, self.settings)
         assert len(plan.images_to_delete) == 1
         assert plan.count_deleted_tags() == 2
@@ -152,7 +131,7 @@ class TestDeletionPlan:
     def test_create_plan_some_tags_expired(self) -> None:
         """Image with some tags to keep should keep all tags."""
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", ["v1.0.0", "dev"], now - timedelta(days=10))]
+        images = [ImageVersion("img1", ("v1.0.0", "dev"), now - timedelta(days=10))]
         plan = create_deletion_plan(images, self.settings)
         assert len(plan.images_to_delete) == 0
         assert len(plan.images_to_keep) == 1
@@ -161,35 +140,100 @@ class TestDeletionPlan:
     def test_create_plan_no_tags_expired(self) -> None:
         """Image with no tags expired should be kept."""
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", ["v1.0.0", "main"], now - timedelta(days=3))]
+        images = [ImageVersion("img1", ("v1.0.0", "main"), now - timedelta(days=3))]
         plan = create_deletion_plan(images, self.settings)
         assert len(plan.images_to_delete) == 0
         assert len(plan.images_to_keep) == 1
         assert plan.count_kept_tags() == 2
 
+    def test_create_plan_debug_matches_default(self) -> None:
+        """Building per-tag debug reasons does not change decisions."""
+        now = datetime.now(UTC)
+        images = [
+            ImageVersion("img1", ("v1.0.0", "dev"), now - timedelta(days=10)),
+            ImageVersion("img2", ("pr-1", "dev"), now - timedelta(days=40)),
+        ]
+        plan = create_deletion_plan(images, self.settings)
+        self.settings.DEBUG = True
+        debug_plan = create_deletion_plan(images, self.settings)
+        assert debug_plan == plan
+
+    def test_create_plan_flagged_version_pattern(self) -> None:
+        """A VERSION_PATTERN with inline flags still protects matching tags."""
+        settings = Settings(VERSION_PATTERN=r"(?i)^(v?\d+\.\d+\.\d+.*|latest)$")
+        now = datetime.now(UTC)
+        images = [ImageVersion("img1", ("LATEST",), now - timedelta(days=400))]
+        plan = create_deletion_plan(images, settings)
+        assert plan.images_to_keep == [
+            ImageDecision(images[0], "keep", "has_tags_to_keep")
+        ]
+
+    def test_create_plan_classifies_repeated_tags_once(self) -> None:
+        """Tag names shared across images are matched against the patterns once."""
+        now = datetime.now(UTC)
+        images = [
+            ImageVersion(f"img{i}", ("main", "dev"), now - timedelta(days=10))
+            for i in range(5)
+        ]
+        with patch(
+            "container_registry_cleanup.logic._tag_kind", wraps=_tag_kind
+        ) as mock_tag_kind:
+            plan = create_deletion_plan(images, self.settings)
+        assert mock_tag_kind.call_count == 2
+        assert len(plan.images_to_delete) == 5
+
+    def test_create_plan_stops_at_first_kept_tag(self) -> None:
+        """Remaining tags are not classified once one tag keeps the image."""
+        now = datetime.now(UTC)
+        images = [
+            ImageVersion("img1", ("v1.0.0", "dev", "pr-1"), now - timedelta(days=40))
+        ]
+        with patch(
+            "container_registry_cleanup.logic._tag_kind", wraps=_tag_kind
+        ) as mock_tag_kind:
+            plan = create_deletion_plan(images, self.settings)
+        assert mock_tag_kind.call_count == 1
+        assert plan.images_to_keep == [
+            ImageDecision(images[0], "keep", "has_tags_to_keep")
+        ]
+
+    def test_create_plan_young_image_skips_tag_matching(self) -> None:
+        """Images within every retention window are kept without classifying tags."""
+        now = datetime.now(UTC)
+        images = [ImageVersion("img1", ("dev", "pr-1"), now - timedelta(days=3))]
+        with patch(
+            "container_registry_cleanup.logic._tag_kind", wraps=_tag_kind
+        ) as mock_tag_kind:
+            plan = create_deletion_plan(images, self.settings)
+        assert mock_tag_kind.call_count == 0
+        assert plan.images_to_keep == [
+            ImageDecision(images[0], "keep", "has_tags_to_keep")
+        ]
+
     def test_create_plan_untagged_old(self) -> None:
         """Old untagged image should be deleted."""
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", [], now - timedelta(days=10))]
+        images = [ImageVersion("img1", (), now - timedelta(days=10))]
         plan = create_deletion_plan(images, self.settings)
         assert len(plan.images_to_delete) == 1
         assert (
-            plan.images_to_delete[0][1]
+            plan.images_to_delete[0].reason
             == "untagged >7d (10d old); not_protected_by_reference"
         )
 
     def test_create_plan_untagged_new(self) -> None:
         """New untagged image should be kept."""
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", [], now - timedelta(days=3))]
+        images = [ImageVersion("img1", (), now - timedelta(days=3))]
         plan = create_deletion_plan(images, self.settings)
         assert len(plan.images_to_delete) == 0
         assert len(plan.images_to_keep) == 1
 
 
 class TestGHCROCIIndexSafety:
-    def setup_method(self) -> None:
-        self.settings = Settings()
+    @pytest.fixture(autouse=True)
+    def _use_settings(self, settings: Settings) -> None:
+        self.settings = settings
         self.settings.OTHERS_RETENTION_DAYS = 7
         self.settings.TEST_RETENTION_DAYS = 30
 
@@ -199,19 +243,19 @@ class TestGHCROCIIndexSafety:
 
         tagged_index = _image_with_protection(
             "idx1",
-            ["v0.12.0"],
+            ("v0.12.0",),
             now - timedelta(days=200),
             protected=True,
         )
         untagged_child_amd64 = _image_with_protection(
             "child-amd64",
-            [],
+            (),
             now - timedelta(days=120),
             protected=True,
         )
         untagged_child_arm64 = _image_with_protection(
             "child-arm64",
-            [],
+            (),
             now - timedelta(days=120),
             protected=True,
         )
@@ -219,7 +263,7 @@ class TestGHCROCIIndexSafety:
         images = [tagged_index, untagged_child_amd64, untagged_child_arm64]
         plan = create_deletion_plan(images, self.settings)
 
-        kept_ids = {img.identifier for img, _ in plan.images_to_keep}
+        kept_ids = {d.image.identifier for d in plan.images_to_keep}
 
         assert {"idx1", "child-amd64", "child-arm64"} <= kept_ids
         assert len(plan.images_to_delete) == 0
@@ -230,7 +274,7 @@ class TestGHCROCIIndexSafety:
 
         orphan_leaf = _image_with_protection(
             "orphan-leaf",
-            [],
+            (),
             now - timedelta(days=30),
             protected=False,
             protected_reason="not_referenced_by_any_tagged_root",
@@ -239,7 +283,7 @@ class TestGHCROCIIndexSafety:
         plan = create_deletion_plan([orphan_leaf], self.settings)
 
         assert len(plan.images_to_delete) == 1
-        assert plan.images_to_delete[0][0].identifier == "orphan-leaf"
+        assert plan.images_to_delete[0].image.identifier == "orphan-leaf"
 
     def test_multi_platform_index_scenario_keeps_all_referenced_platform_manifests(
         self,
@@ -249,25 +293,25 @@ class TestGHCROCIIndexSafety:
 
         tagged_multi_index = _image_with_protection(
             "index-multi",
-            ["v1.2.3"],
+            ("v1.2.3",),
             now - timedelta(days=100),
             protected=True,
         )
         amd64_manifest = _image_with_protection(
             "linux-amd64",
-            [],
+            (),
             now - timedelta(days=95),
             protected=True,
         )
         arm64_manifest = _image_with_protection(
             "linux-arm64",
-            [],
+            (),
             now - timedelta(days=95),
             protected=True,
         )
         old_orphan = _image_with_protection(
             "old-orphan",
-            [],
+            (),
             now - timedelta(days=95),
             protected=False,
             protected_reason="not_referenced_by_any_tagged_root",
@@ -278,11 +322,12 @@ class TestGHCROCIIndexSafety:
             self.settings,
         )
 
-        kept_ids = {img.identifier for img, _ in plan.images_to_keep}
-        deleted_ids = {img.identifier for img, _ in plan.images_to_delete}
+        kept_ids = {d.image.identifier for d in plan.images_to_keep}
+        deleted_ids = {d.image.identifier for d in plan.images_to_delete}
 
         assert {"index-multi", "linux-amd64", "linux-arm64"} <= kept_ids
         assert "old-orphan" in deleted_ids
+        assert kept_ids.isdisjoint(deleted_ids)
 
 
 class TestExecutePlan:
@@ -292,25 +337,25 @@ class TestExecutePlan:
 
         plan = DeletionPlan([], [])
         mock_registry = cast(Any, type("MockRegistry", (), {}))
-        errors = execute_plan(mock_registry, plan, [], dry_run=False)
+        errors = execute_plan(mock_registry, plan, dry_run=False)
         assert errors == 0
 
-    def test_execute_with_mock_registry(self) -> None:
+    def test_execute_with_mock_registry(self, settings: Settings) -> None:
         """Test execution with mocked registry."""
         mock_registry = MagicMock()
         mock_registry.delete_image = MagicMock()
 
         now = datetime.now(UTC)
-        images = [ImageVersion("img1", ["dev"], now - timedelta(days=10))]
-        plan = create_deletion_plan(images, Settings())
+        images = [ImageVersion("img1", ("dev",), now - timedelta(days=10))]
+        plan = create_deletion_plan(images, settings)
 
-        errors = execute_plan(mock_registry, plan, images, dry_run=False)
+        errors = execute_plan(mock_registry, plan, dry_run=False)
         assert errors == 0
         mock_registry.delete_image.assert_called_once()
 
 
 class TestExecutePlanErrors:
-    def test_execute_plan_with_errors(self) -> None:
+    def test_execute_plan_with_errors(self, settings: Settings) -> None:
         """Test execute_plan error handling."""
         mock_registry = MagicMock()
         mock_registry.delete_image.side_effect = requests.exceptions.RequestException(
@@ -318,29 +363,49 @@ class TestExecutePlanErrors:
         )
 
         now = datetime.now(UTC)
-        settings = Settings()
         settings.OTHERS_RETENTION_DAYS = 7
-        images = [ImageVersion("img1", ["dev"], now - timedelta(days=10))]
+        images = [ImageVersion("img1", ("dev",), now - timedelta(days=10))]
+        plan = create_deletion_plan(images, settings)
+
+        errors = execute_plan(mock_registry, plan, dry_run=False)
+        assert errors == 1
+
+    def test_execute_plan_concurrent_partial_errors(self, settings: Settings) -> None:
+        """Concurrent deletions count successes and failures independently."""
+        mock_registry = MagicMock()
+
+        def delete_image(image: ImageVersion) -> None:
+            if image.identifier == "img2":
+                raise requests.exceptions.RequestException("API error")
+
+        mock_registry.delete_image.side_effect = delete_image
+
+        now = datetime.now(UTC)
+        images = [
+            ImageVersion(f"img{i}", ("dev",), now - timedelta(days=10))
+            for i in range(5)
+        ]
         plan = create_deletion_plan(images, settings)
 
-        errors = execute_plan(mock_registry, plan, images, dry_run=False)
+        errors = execute_plan(mock_registry, plan, dry_run=False, concurrency=4)
         assert errors == 1
+        assert mock_registry.delete_image.call_count == 5
 
     def test_dry_run(self) -> None:
         """Test dry run mode prints plan without executing."""
         from container_registry_cleanup.logic import DeletionPlan
 
         now = datetime.now(UTC)
-        img1 = ImageVersion("img1", ["dev"], now - timedelta(days=10))
-        img2 = ImageVersion("img2", ["v1.0.0"], now - timedelta(days=3))
+        img1 = ImageVersion("img1", ("dev",), now - timedelta(days=10))
+        img2 = ImageVersion("img2", ("v1.0.0",), now - timedelta(days=3))
 
         plan = DeletionPlan(
-            images_to_delete=[(img1, "all_tags_expired")],
-            images_to_keep=[(img2, "has_tags_to_keep")],
+            images_to_delete=[ImageDecision(img1, "delete", "all_tags_expired")],
+            images_to_keep=[ImageDecision(img2, "keep", "has_tags_to_keep")],
         )
 
         mock_registry = MagicMock()
-        errors = execute_plan(mock_registry, plan, [img1, img2], dry_run=True)
+        errors = execute_plan(mock_registry, plan, dry_run=True)
 
         # Should not call delete in dry run
         mock_registry.delete_image.assert_not_called()
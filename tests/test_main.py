@@ -1,84 +1,53 @@
 """Tests for main module."""
 
-import importlib.util
-import sys
+from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any, cast
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
-_main_path = (
-    Path(__file__).parent.parent / "src" / "container_registry_cleanup" / "__main__.py"
-)
-_main_spec = importlib.util.spec_from_file_location(
-    "container_registry_cleanup.__main__", _main_path
-)
-assert _main_spec is not None
-_main_module = importlib.util.module_from_spec(_main_spec)
-# Temporarily replace sys.exit to prevent exit during import
-_original_exit = sys.exit
-sys.exit = cast(Any, lambda _code: None)
-try:
-    assert _main_spec.loader is not None
-    _main_spec.loader.exec_module(_main_module)
-finally:
-    sys.exit = cast(Any, _original_exit)
-main = _main_module.main
-
-
-def test_main_returns_zero(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Test that main() returns 0 when REGISTRY_TYPE is set."""
-    monkeypatch.setenv("REGISTRY_TYPE", "ghcr")
-    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
-    monkeypatch.setenv("REPOSITORY_NAME", "test-repo")
-    monkeypatch.setenv("GITHUB_REPO_OWNER", "test-org")
-    # Mock the registry to avoid actual API calls
-    monkeypatch.setattr(
-        "container_registry_cleanup.registry.ghcr.GHCRClient.list_images",
-        lambda self: [],
-    )
-    assert main() == 0
+from container_registry_cleanup.__main__ import main
+from container_registry_cleanup.base import ImageVersion
+from container_registry_cleanup.logic import DeletionPlan, ImageDecision, write_summary
+from container_registry_cleanup.settings import Settings
 
 
 class TestMainFunction:
-    def test_main_error_handling(self, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Test main() handles registry initialization errors."""
-        monkeypatch.setenv("REGISTRY_TYPE", "invalid")
-        assert main() == 1
-
-    def test_main_dry_run(self, monkeypatch: pytest.MonkeyPatch) -> None:
-        """Test main() in dry-run mode."""
+    @pytest.mark.usefixtures("ghcr_env")
+    @pytest.mark.parametrize("dry_run", [True, False])
+    def test_main_returns_zero(
+        self, monkeypatch: pytest.MonkeyPatch, dry_run: bool
+    ) -> None:
+        """Test main() returns 0 for an empty registry, in both run modes."""
         monkeypatch.setenv("REGISTRY_TYPE", "ghcr")
-        monkeypatch.setenv("GITHUB_TOKEN", "test-token")
         monkeypatch.setenv("REPOSITORY_NAME", "test-repo")
-        monkeypatch.setenv("GITHUB_REPO_OWNER", "test-org")
-        monkeypatch.setenv("DRY_RUN", "true")
+        monkeypatch.setenv("DRY_RUN", str(dry_run).lower())
+        # Mock the registry to avoid actual API calls
         monkeypatch.setattr(
             "container_registry_cleanup.registry.ghcr.GHCRClient.list_images",
             lambda self: [],
         )
         assert main() == 0
 
+    def test_main_error_handling(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test main() handles registry initialization errors."""
+        monkeypatch.setenv("REGISTRY_TYPE", "invalid")
+        assert main() == 1
+
 
 class TestWriteSummary:
     def test_write_summary(
         self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
     ) -> None:
         """Test write_summary writes to file when GITHUB_STEP_SUMMARY is set."""
-        from datetime import UTC, datetime
-
-        from container_registry_cleanup.base import ImageVersion
-        from container_registry_cleanup.logic import DeletionPlan, write_summary
-        from container_registry_cleanup.settings import Settings
-
-        img1 = ImageVersion("img1", ["tag1"], datetime.now(UTC))
-        img2 = ImageVersion("img2", ["tag2"], datetime.now(UTC))
-        img3 = ImageVersion("img3abc123def456", ["v1.0", "latest"], datetime.now(UTC))
+        img1 = ImageVersion("img1", ("tag1",), datetime.now(UTC))
+        img2 = ImageVersion("img2", ("tag2",), datetime.now(UTC))
+        img3 = ImageVersion("img3abc123def456", ("v1.0", "latest"), datetime.now(UTC))
         plan = DeletionPlan(
-            images_to_delete=[(img3, "test tag >30d (45d old)")],
-            images_to_keep=[(img1, "reason1"), (img2, "reason2")],
+            images_to_delete=[ImageDecision(img3, "delete", "test tag >30d (45d old)")],
+            images_to_keep=[
+                ImageDecision(img1, "keep", "reason1"),
+                ImageDecision(img2, "keep", "reason2"),
+            ],
         )
         errors = 1
 
@@ -94,46 +63,47 @@ class TestWriteSummary:
         summary_file = tmp_path / "summary.md"
         assert summary_file.exists()
         content = summary_file.read_text()
-        assert "Container Image Cleanup" in content
-        assert "| Kept | 2 |" in content
-        assert "| To Delete (images) | 1 |" in content
-        assert "| To Delete (tags) | 2 |" in content
-        assert "| Errors | 1 |" in content
-        assert "Dry Run" in content
-        assert "Test=30d" in content
-        assert "Others=7d" in content
-        # Check expandable sections exist
-        assert "<details>" in content
-        assert "</details>" in content
-        assert "To Delete: 1 images (2 tags)" in content
-        assert "Kept: 2 images (2 tags)" in content
-        # Check image details in expandable sections
-        assert "`img3abc123de`" in content  # Truncated identifier
-        assert "v1.0, latest" in content
-        assert "_test tag >30d (45d old)_" in content
-        assert "`img1`" in content
-        assert "tag1" in content
+        expected = [
+            "Container Image Cleanup",
+            "| Kept | 2 |",
+            "| To Delete (images) | 1 |",
+            "| To Delete (tags) | 2 |",
+            "| Errors | 1 |",
+            "Dry Run",
+            "Test=30d",
+            "Others=7d",
+            # Expandable sections
+            "<details>",
+            "</details>",
+            "To Delete: 1 images (2 tags)",
+            "Kept: 2 images (2 tags)",
+            # Image details in expandable sections
+            "`img3abc123de`",  # Truncated identifier
+            "v1.0, latest",
+            "_test tag >30d (45d old)_",
+            "`img1`",
+            "tag1",
+        ]
+        missing = [s for s in expected if s not in content]
+        assert not missing, missing
 
     def test_write_summary_live_mode(
         self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
     ) -> None:
         """Test write_summary shows 'Deleted' label in live mode."""
-        from datetime import UTC, datetime
-
-        from container_registry_cleanup.base import ImageVersion
-        from container_registry_cleanup.logic import DeletionPlan, write_summary
-        from container_registry_cleanup.settings import Settings
-
-        img1 = ImageVersion("img1", ["tag1"], datetime.now(UTC))
-        img2 = ImageVersion("img2", ["tag2"], datetime.now(UTC))
-        img3 = ImageVersion("untagged123", [], datetime.now(UTC))
-        img4 = ImageVersion("img4", ["v2.0"], datetime.now(UTC))
+        img1 = ImageVersion("img1", ("tag1",), datetime.now(UTC))
+        img2 = ImageVersion("img2", ("tag2",), datetime.now(UTC))
+        img3 = ImageVersion("untagged123", (), datetime.now(UTC))
+        img4 = ImageVersion("img4", ("v2.0",), datetime.now(UTC))
         plan = DeletionPlan(
             images_to_delete=[
-                (img3, "untagged >7d (10d old)"),
-                (img4, "other tag >7d (15d old)"),
+                ImageDecision(img3, "delete", "untagged >7d (10d old)"),
+                ImageDecision(img4, "delete", "other tag >7d (15d old)"),
+            ],
+            images_to_keep=[
+                ImageDecision(img1, "keep", "reason1"),
+                ImageDecision(img2, "keep", "reason2"),
             ],
-            images_to_keep=[(img1, "reason1"), (img2, "reason2")],
         )
         errors = 0
 
@@ -149,16 +119,20 @@ class TestWriteSummary:
         summary_file = tmp_path / "summary.md"
         assert summary_file.exists()
         content = summary_file.read_text()
-        assert "Container Image Cleanup" in content
-        assert "| Kept | 2 |" in content
-        assert "| Deleted (images) | 2 |" in content
-        assert "| Deleted (tags) | 1 |" in content
-        assert "| Errors | 0 |" in content
-        assert "Live" in content
-        # Check expandable sections with "Deleted" label
-        assert "Deleted: 2 images" in content
-        assert "Kept: 2 images (2 tags)" in content
-        # Check untagged image handling
-        assert "`untagged123`" in content
-        assert "untagged" in content
-        assert "_untagged >7d (10d old)_" in content
+        expected = [
+            "Container Image Cleanup",
+            "| Kept | 2 |",
+            "| Deleted (images) | 2 |",
+            "| Deleted (tags) | 1 |",
+            "| Errors | 0 |",
+            "Live",
+            # Expandable sections with "Deleted" label
+            "Deleted: 2 images",
+            "Kept: 2 images (2 tags)",
+            # Untagged image handling
+            "`untagged123`",
+            "untagged",
+            "_untagged >7d (10d old)_",
+        ]
+        missing = [s for s in expected if s not in content]
+        assert not missing, missing
@@ -0,0 +1,59 @@
+"""Shared fixtures for registry client tests."""
+
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from container_registry_cleanup.registry import GHCRClient, HarborClient
+
+
+@pytest.fixture
+def ghcr_client() -> GHCRClient:
+    return GHCRClient("token", "org", "pkg")
+
+
+@pytest.fixture
+def harbor_client() -> HarborClient:
+    return HarborClient("https://harbor.example.com", "user", "pass", "proj", "repo")
+
+
+@pytest.fixture
+def http(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Replace `requests.Session.get`/`delete` with mocks for the test's duration.
+
+    Configure `http.get` / `http.delete` like any MagicMock; calls made through a
+    client's session are recorded without the session argument.
+    """
+    fakes = SimpleNamespace(get=MagicMock(), delete=MagicMock())
+    monkeypatch.setattr(requests.Session, "get", fakes.get)
+    monkeypatch.setattr(requests.Session, "delete", fakes.delete)
+    return fakes
+
+
+@pytest.fixture
+def make_json_response() -> Callable[..., SimpleNamespace]:
+    """Factory for successful `requests.Response` stand-ins carrying a JSON payload.
+
+    Only the attributes the clients read are provided; tests assert on the
+    patched session methods, never on the response itself.
+    """
+
+    def make(
+        payload: Any = None,
+        *,
+        headers: dict[str, str] | None = None,
+        links: dict[str, dict[str, str]] | None = None,
+    ) -> SimpleNamespace:
+        return SimpleNamespace(
+            status_code=200,
+            json=lambda: payload,
+            raise_for_status=lambda: None,
+            headers=headers or {},
+            links=links or {},
+        )
+
+    return make
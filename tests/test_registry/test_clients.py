@@ -0,0 +1,71 @@
+"""Tests shared by every registry client."""
+
+from collections.abc import Callable
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from requests.adapters import HTTPAdapter
+
+from container_registry_cleanup.base import ImageVersion
+from container_registry_cleanup.registry import GHCRClient, HarborClient
+
+# Creation time for images whose age the test does not depend on.
+_FIXED_TS = datetime(2024, 1, 1, tzinfo=UTC)
+
+# Client fixture name, and the path segments each client puts in its API URLs.
+CLIENTS = {
+    "ghcr": ("ghcr_client", ("org", "pkg")),
+    "harbor": ("harbor_client", ("proj", "repo")),
+}
+
+
+@pytest.fixture(params=list(CLIENTS.values()), ids=list(CLIENTS))
+def client_case(
+    request: pytest.FixtureRequest,
+) -> tuple[GHCRClient | HarborClient, tuple[str, ...]]:
+    fixture_name, url_parts = request.param
+    return request.getfixturevalue(fixture_name), url_parts
+
+
+class TestRegistryClients:
+    def test_list_images_empty_response(
+        self,
+        http: SimpleNamespace,
+        client_case: tuple[GHCRClient | HarborClient, tuple[str, ...]],
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        client, _ = client_case
+
+        http.get.return_value = make_json_response([])
+        images = client.list_images()
+
+        assert len(images) == 0
+
+    def test_delete_image(
+        self,
+        http: SimpleNamespace,
+        client_case: tuple[GHCRClient | HarborClient, tuple[str, ...]],
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        client, url_parts = client_case
+        image = ImageVersion("sha256:abc123", ("tag1",), _FIXED_TS)
+
+        http.delete.return_value = make_json_response()
+        client.delete_image(image)
+
+        http.delete.assert_called_once()
+        call_url = http.delete.call_args[0][0]
+        for part in (*url_parts, "sha256:abc123"):
+            assert part in call_url
+
+    def test_session_retries_forbidden_with_retry_after(
+        self, client_case: tuple[GHCRClient | HarborClient, tuple[str, ...]]
+    ) -> None:
+        """A 403 with Retry-After, as GitHub's secondary rate limit sends, is retried."""
+        client, _ = client_case
+        adapter = client.session.get_adapter("https://example.com")
+        assert isinstance(adapter, HTTPAdapter)
+
+        assert adapter.max_retries.is_retry("DELETE", 403, has_retry_after=True)
+        assert not adapter.max_retries.is_retry("DELETE", 403)
@@ -1,35 +1,36 @@
 """Tests for GHCR client."""
 
-import sys
+from collections.abc import Callable
 from datetime import UTC, datetime
-from pathlib import Path
+from types import SimpleNamespace
 from typing import Any
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
-
-from container_registry_cleanup.base import ImageVersion
+from container_registry_cleanup.base import PAGE_SIZE, ImageVersion
 from container_registry_cleanup.registry import GHCRClient
 from container_registry_cleanup.settings import Settings
 
+# Creation time for images whose age the test does not depend on.
+_FIXED_TS = datetime(2024, 1, 1, tzinfo=UTC)
+
 
 class TestGHCRClient:
-    def test_from_settings_missing_repository(self) -> None:
+    def test_from_settings_missing_repository(self, settings: Settings) -> None:
         """Test from_settings raises error when REPOSITORY_NAME is missing."""
-        settings = Settings()
         settings.REPOSITORY_NAME = ""  # Explicitly set to empty
         settings.REGISTRY_TYPE = "ghcr"
         with pytest.raises(ValueError, match="REPOSITORY_NAME"):
             GHCRClient.from_settings(settings)
 
-    def test_from_settings_with_env_vars(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    def test_from_settings_with_env_vars(
+        self, settings: Settings, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         """Test from_settings reads from environment variables."""
         monkeypatch.setenv("GITHUB_TOKEN", "env-token")
         monkeypatch.setenv("GITHUB_REPO_OWNER", "env-org")
 
-        settings = Settings()
         settings.REPOSITORY_NAME = "test-repo"
         client = GHCRClient.from_settings(settings)
 
@@ -38,126 +39,184 @@ class TestGHCRClient:
         assert client.repository_name == "test-repo"
 
     def test_from_settings_with_github_repo_owner(
-        self, monkeypatch: pytest.MonkeyPatch
+        self, settings: Settings, monkeypatch: pytest.MonkeyPatch
     ) -> None:
         """Test from_settings reads GITHUB_REPO_OWNER."""
         monkeypatch.setenv("GITHUB_TOKEN", "token")
         monkeypatch.setenv("GITHUB_REPO_OWNER", "alt-org")
 
-        settings = Settings()
         settings.REPOSITORY_NAME = "test-repo"
         client = GHCRClient.from_settings(settings)
 
         assert client.token == "token"
         assert client.org_name == "alt-org"
 
+    @pytest.mark.usefixtures("ghcr_env")
+    def test_from_settings_fetch_concurrency(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test from_settings sizes the manifest fetch pool from settings."""
+        monkeypatch.setenv("FETCH_CONCURRENCY", "4")
+
+        settings = Settings()
+        settings.REPOSITORY_NAME = "test-repo"
+        client = GHCRClient.from_settings(settings)
+
+        assert client.max_workers == 4
+
     def test_headers_setup(self) -> None:
         client = GHCRClient("token123", "myorg", "mypackage")
         assert "Bearer token123" in client.headers["Authorization"]
         assert client.headers["Accept"] == "application/vnd.github+json"
         assert client.headers["X-GitHub-Api-Version"] == "2022-11-28"
+        assert client.session.headers["Authorization"] == "Bearer token123"
         assert client.org_name == "myorg"
         assert client.repository_name == "mypackage"
 
-    def test_list_images_single_page(self) -> None:
+    def test_list_images_single_page(
+        self,
+        http: SimpleNamespace,
+        ghcr_client: GHCRClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
         """Test list_images with single page response."""
-        client = GHCRClient("token", "org", "pkg")
-
-        # First call returns data, second call returns empty to break pagination loop
-        mock_response_with_data = MagicMock()
-        mock_response_with_data.json.return_value = [
-            {
-                "id": 123,
-                "created_at": "2024-01-01T00:00:00Z",
-                "metadata": {"container": {"tags": ["tag1", "tag2"]}},
-            }
-        ]
-        mock_response_with_data.raise_for_status = MagicMock()
-
-        mock_response_empty = MagicMock()
-        mock_response_empty.json.return_value = []
-        mock_response_empty.raise_for_status = MagicMock()
+        mock_response_with_data = make_json_response(
+            [
+                {
+                    "id": 123,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "metadata": {"container": {"tags": ["tag1", "tag2"]}},
+                }
+            ]
+        )
 
-        with patch(
-            "requests.get", side_effect=[mock_response_with_data, mock_response_empty]
-        ):
-            images = client.list_images()
+        http.get.return_value = mock_response_with_data
+        images = ghcr_client.list_images()
 
+        # Without a rel="next" link there is no follow-up request for an empty page.
+        assert http.get.call_count == 1
         assert len(images) == 1
         assert images[0].identifier == "123"
-        assert images[0].tags == ["tag1", "tag2"]
+        assert images[0].tags == ("tag1", "tag2")
+        assert images[0].created_at == datetime(2024, 1, 1, tzinfo=UTC)
 
-    def test_list_images_empty_response(self) -> None:
-        """Test list_images with empty response."""
-        client = GHCRClient("token", "org", "pkg")
-        mock_response = MagicMock()
-        mock_response.json.return_value = []
-        mock_response.raise_for_status = MagicMock()
+    def test_list_images_fetches_remaining_pages_from_link_header(
+        self,
+        http: SimpleNamespace,
+        ghcr_client: GHCRClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        """Test list_images uses rel="last" to fetch all pages without probing."""
+
+        def make_page(version_id: int) -> SimpleNamespace:
+            return make_json_response(
+                [
+                    {
+                        "id": version_id,
+                        "created_at": "2024-01-01T00:00:00Z",
+                        "metadata": {"container": {"tags": []}},
+                    }
+                ],
+                links={
+                    "last": {
+                        "url": "https://api.github.com/orgs/org/packages/container/pkg/versions?page=3&per_page=100"
+                    }
+                },
+            )
 
-        with patch("requests.get", return_value=mock_response):
-            images = client.list_images()
+        pages = {1: make_page(1), 2: make_page(2), 3: make_page(3)}
 
-        assert len(images) == 0
+        def fake_get(url: str, **kwargs: Any) -> SimpleNamespace:
+            return pages[kwargs["params"]["page"]]
 
-    def test_delete_image(self) -> None:
-        """Test delete_image makes correct API call."""
-        client = GHCRClient("token", "org", "pkg")
-        image = ImageVersion("img123", ["tag1"], datetime.now(UTC))
+        http.get.side_effect = fake_get
+        images = ghcr_client.list_images()
 
-        mock_response = MagicMock()
-        mock_response.raise_for_status = MagicMock()
+        assert [image.identifier for image in images] == ["1", "2", "3"]
+        assert http.get.call_count == 3
 
-        with patch("requests.delete", return_value=mock_response) as mock_delete:
-            client.delete_image(image)
-            mock_delete.assert_called_once()
-            call_url = mock_delete.call_args[0][0]
-            assert "org" in call_url
-            assert "pkg" in call_url
-            assert "img123" in call_url
+    def test_list_images_follows_next_links(
+        self,
+        http: SimpleNamespace,
+        ghcr_client: GHCRClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        """Without rel="last", list_images fetches pages while rel="next" is set."""
+        next_link = {"next": {"url": "https://api.github.com/?page=next"}}
+        http.get.side_effect = [
+            make_json_response(
+                [{"id": page, "created_at": "2024-01-01T00:00:00Z"}],
+                links=next_link if page < 3 else {},
+            )
+            for page in (1, 2, 3)
+        ]
+        images = ghcr_client.list_images()
 
-    def test_delete_tag_with_multiple_tags_raises_error(self) -> None:
+        assert [image.identifier for image in images] == ["1", "2", "3"]
+        assert http.get.call_count == 3
+
+    def test_list_images_without_link_header_reads_while_pages_are_full(
+        self,
+        http: SimpleNamespace,
+        ghcr_client: GHCRClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        """A full page with no Link header is not taken as the last page."""
+        full_page = [
+            {"id": i, "created_at": "2024-01-01T00:00:00Z"} for i in range(PAGE_SIZE)
+        ]
+        last_page = [{"id": PAGE_SIZE, "created_at": "2024-01-01T00:00:00Z"}]
+        http.get.side_effect = [
+            make_json_response(full_page),
+            make_json_response(last_page),
+        ]
+        images = ghcr_client.list_images()
+
+        assert len(images) == PAGE_SIZE + 1
+        assert http.get.call_count == 2
+
+    def test_delete_tag_with_multiple_tags_raises_error(
+        self, ghcr_client: GHCRClient
+    ) -> None:
         """GHCR REST API can only delete versions (manifests), not individual tags.
 
         When a version has multiple tags, deleting it would remove all tags.
         This implementation prevents accidental deletion of other tags.
         """
-        client = GHCRClient("token", "org", "pkg")
-        image = ImageVersion("digest1", ["tag1", "tag2"], datetime.now(UTC))
+        image = ImageVersion("digest1", ("tag1", "tag2"), _FIXED_TS)
 
         with pytest.raises(ValueError, match="GHCR's REST API would delete the entire"):
-            client.delete_tag(image, "tag1")
+            ghcr_client.delete_tag(image, "tag1")
 
-    def test_delete_tag_with_single_tag(self) -> None:
+    def test_delete_tag_with_single_tag(self, ghcr_client: GHCRClient) -> None:
         """GHCR can delete tag when it's the only tag."""
-        client = GHCRClient("token", "org", "pkg")
-        image = ImageVersion("digest1", ["tag1"], datetime.now(UTC))
+        image = ImageVersion("digest1", ("tag1",), _FIXED_TS)
 
-        with patch.object(client, "delete_image") as mock_delete:
-            client.delete_tag(image, "tag1")
+        with patch.object(ghcr_client, "delete_image") as mock_delete:
+            ghcr_client.delete_tag(image, "tag1")
             mock_delete.assert_called_once_with(image)
 
     def test_annotate_oci_references_tagged_index_protects_untagged_children(
-        self,
+        self, ghcr_client: GHCRClient
     ) -> None:
         """Tagged OCI index should protect referenced untagged child manifests."""
-        client = GHCRClient("token", "org", "pkg")
         now = datetime.now(UTC)
 
         tagged_index = ImageVersion(
             "id-index",
-            ["titiler-openeo-v0.12.0"],
+            ("titiler-openeo-v0.12.0",),
             now,
             metadata={"version": {"name": "sha256:index"}},
         )
         untagged_child_amd64 = ImageVersion(
             "id-amd64",
-            [],
+            (),
             now,
             metadata={"version": {"name": "sha256:amd64"}},
         )
         untagged_child_arm64 = ImageVersion(
             "id-arm64",
-            [],
+            (),
             now,
             metadata={"version": {"name": "sha256:arm64"}},
         )
@@ -183,9 +242,9 @@ class TestGHCRClient:
         }
 
         with patch.object(
-            client, "_get_manifest", side_effect=lambda d: manifest_map.get(d)
+            ghcr_client, "_get_manifest", side_effect=lambda d: manifest_map.get(d)
         ):
-            client._annotate_oci_references(
+            ghcr_client._annotate_oci_references(
                 [tagged_index, untagged_child_amd64, untagged_child_arm64]
             )
 
@@ -197,32 +256,33 @@ class TestGHCRClient:
         assert untagged_child_amd64.metadata["protected_by_tag_or_index"] is True
         assert untagged_child_arm64.metadata["protected_by_tag_or_index"] is True
 
-    def test_annotate_oci_references_multi_platform_and_orphan_digest(self) -> None:
+    def test_annotate_oci_references_multi_platform_and_orphan_digest(
+        self, ghcr_client: GHCRClient
+    ) -> None:
         """Multi-platform tagged index protects referenced manifests, not orphan digest."""
-        client = GHCRClient("token", "org", "pkg")
         now = datetime.now(UTC)
 
         tagged_multi = ImageVersion(
             "id-multi",
-            ["v1.2.3"],
+            ("v1.2.3",),
             now,
             metadata={"version": {"name": "sha256:multi-index"}},
         )
         amd64_manifest = ImageVersion(
             "id-linux-amd64",
-            [],
+            (),
             now,
             metadata={"version": {"name": "sha256:linux-amd64"}},
         )
         arm64_manifest = ImageVersion(
             "id-linux-arm64",
-            [],
+            (),
             now,
             metadata={"version": {"name": "sha256:linux-arm64"}},
         )
         orphan_digest = ImageVersion(
             "id-orphan",
-            [],
+            (),
             now,
             metadata={"version": {"name": "sha256:orphan"}},
         )
@@ -248,9 +308,9 @@ class TestGHCRClient:
         }
 
         with patch.object(
-            client, "_get_manifest", side_effect=lambda d: manifest_map.get(d)
+            ghcr_client, "_get_manifest", side_effect=lambda d: manifest_map.get(d)
         ):
-            client._annotate_oci_references(
+            ghcr_client._annotate_oci_references(
                 [tagged_multi, amd64_manifest, arm64_manifest, orphan_digest]
             )
 
@@ -262,3 +322,40 @@ class TestGHCRClient:
             orphan_digest.metadata["protected_reason"]
             == "not_referenced_by_any_tagged_root"
         )
+
+    def test_collect_protected_digests_fetches_each_manifest_once(self) -> None:
+        """Shared children are fetched once, and nested indexes are walked fully."""
+        client = GHCRClient("token", "org", "pkg", max_workers=4)
+
+        manifest_map: dict[str, dict[str, Any]] = {
+            "sha256:outer": {
+                "mediaType": "application/vnd.oci.image.index.v1+json",
+                "manifests": [{"digest": "sha256:inner"}, {"digest": "sha256:leaf"}],
+            },
+            "sha256:inner": {
+                "mediaType": "application/vnd.oci.image.index.v1+json",
+                "manifests": [{"digest": "sha256:leaf"}],
+            },
+            "sha256:leaf": {
+                "mediaType": "application/vnd.oci.image.manifest.v1+json",
+                "config": {"digest": "sha256:cfg"},
+                "layers": [{"digest": "sha256:layer"}],
+            },
+        }
+
+        with patch.object(
+            client, "_get_manifest", side_effect=lambda d: manifest_map.get(d)
+        ) as mock_get:
+            protected = client._collect_protected_digests(
+                ["sha256:outer", "sha256:inner"]
+            )
+
+        assert protected == {
+            "sha256:outer",
+            "sha256:inner",
+            "sha256:leaf",
+            "sha256:cfg",
+            "sha256:layer",
+        }
+        fetched = sorted(call.args[0] for call in mock_get.call_args_list)
+        assert fetched == ["sha256:inner", "sha256:leaf", "sha256:outer"]
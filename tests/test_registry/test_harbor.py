@@ -1,41 +1,40 @@
 """Tests for Harbor client."""
 
-import sys
+from collections.abc import Callable
 from datetime import UTC, datetime
-from pathlib import Path
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from typing import Any
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
-
-from container_registry_cleanup.base import ImageVersion
+from container_registry_cleanup.base import PAGE_SIZE, ImageVersion
 from container_registry_cleanup.registry import HarborClient
 from container_registry_cleanup.settings import Settings
 
+# Creation time for images whose age the test does not depend on.
+_FIXED_TS = datetime(2024, 1, 1, tzinfo=UTC)
 
-class TestHarborClient:
-    def test_from_settings_missing_repository(
-        self, monkeypatch: pytest.MonkeyPatch
-    ) -> None:
-        monkeypatch.setenv("HARBOR_URL", "harbor.example.com")
-        monkeypatch.setenv("HARBOR_USERNAME", "user")
-        monkeypatch.setenv("HARBOR_PASSWORD", "pass")
-        monkeypatch.setenv("HARBOR_PROJECT_NAME", "proj")
 
-        settings = Settings()
+class TestHarborClient:
+    @pytest.mark.usefixtures("harbor_env")
+    def test_from_settings_missing_repository(self, settings: Settings) -> None:
         settings.REPOSITORY_NAME = ""
         settings.REGISTRY_TYPE = "harbor"
         with pytest.raises(ValueError, match="REPOSITORY_NAME"):
             HarborClient.from_settings(settings)
 
-    def test_from_settings_with_env_vars(self, monkeypatch: pytest.MonkeyPatch) -> None:
-        monkeypatch.setenv("HARBOR_URL", "harbor.example.com")
-        monkeypatch.setenv("HARBOR_USERNAME", "user")
-        monkeypatch.setenv("HARBOR_PASSWORD", "pass")
-        monkeypatch.setenv("HARBOR_PROJECT_NAME", "proj")
+    @pytest.mark.usefixtures("harbor_env")
+    def test_from_settings_missing_harbor_setting(
+        self, settings: Settings, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.delenv("HARBOR_PASSWORD")
 
-        settings = Settings()
+        settings.REPOSITORY_NAME = "repo"
+        with pytest.raises(ValueError, match="HARBOR_PASSWORD"):
+            HarborClient.from_settings(settings)
+
+    @pytest.mark.usefixtures("harbor_env")
+    def test_from_settings_with_env_vars(self, settings: Settings) -> None:
         settings.REPOSITORY_NAME = "repo"
         client = HarborClient.from_settings(settings)
 
@@ -44,6 +43,7 @@ class TestHarborClient:
         assert client.password == "pass"
         assert client.project_name == "proj"
         assert client.repository_name == "repo"
+        assert client.session.auth == ("user", "pass")
 
     def test_url_normalization(self) -> None:
         client = HarborClient("harbor.example.com", "user", "pass", "proj", "repo")
@@ -73,107 +73,135 @@ class TestHarborClient:
         assert offset is not None
         assert offset.total_seconds() == 0
 
+    def test_parse_time_fractional_seconds(self) -> None:
+        parsed = HarborClient._parse_time("2024-01-01T12:00:00.123Z")
+        assert parsed == datetime(2024, 1, 1, 12, 0, 0, 123000, tzinfo=UTC)
+
     def test_parse_time_datetime(self) -> None:
         dt = datetime.now(UTC)
         parsed = HarborClient._parse_time(dt)
         assert parsed == dt
 
-    def test_list_images_single_page(self) -> None:
-        client = HarborClient(
-            "https://harbor.example.com", "user", "pass", "proj", "repo"
+    def test_list_images_single_page(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        mock_response_with_data = make_json_response(
+            [
+                {
+                    "digest": "sha256:abc123",
+                    "push_time": "2024-01-01T00:00:00Z",
+                    "tags": [{"name": "tag1"}, {"name": "tag2"}],
+                }
+            ]
         )
 
-        mock_response_with_data = MagicMock()
-        mock_response_with_data.json.return_value = [
-            {
-                "digest": "sha256:abc123",
-                "push_time": "2024-01-01T00:00:00Z",
-                "tags": [{"name": "tag1"}, {"name": "tag2"}],
-            }
-        ]
-        mock_response_with_data.raise_for_status = MagicMock()
-
-        mock_response_empty = MagicMock()
-        mock_response_empty.json.return_value = []
-        mock_response_empty.raise_for_status = MagicMock()
-
-        with patch(
-            "requests.get", side_effect=[mock_response_with_data, mock_response_empty]
-        ):
-            images = client.list_images()
+        http.get.return_value = mock_response_with_data
+        images = harbor_client.list_images()
 
+        assert http.get.call_count == 1
         assert len(images) == 1
         assert images[0].identifier == "sha256:abc123"
-        assert images[0].tags == ["tag1", "tag2"]
-
-    def test_list_images_empty_response(self) -> None:
-        client = HarborClient(
-            "https://harbor.example.com", "user", "pass", "proj", "repo"
-        )
-        mock_response = MagicMock()
-        mock_response.json.return_value = []
-        mock_response.raise_for_status = MagicMock()
-
-        with patch("requests.get", return_value=mock_response):
-            images = client.list_images()
+        assert images[0].tags == ("tag1", "tag2")
 
-        assert len(images) == 0
-
-    def test_list_images_empty_tags(self) -> None:
-        client = HarborClient(
-            "https://harbor.example.com", "user", "pass", "proj", "repo"
-        )
-
-        mock_response_with_data = MagicMock()
-        mock_response_with_data.json.return_value = [
-            {
-                "digest": "sha256:abc123",
-                "push_time": "2024-01-01T00:00:00Z",
-                "tags": None,
-            }
+    def test_list_images_follows_next_links(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        """Without X-Total-Count, list_images fetches pages while rel="next" is set."""
+        http.get.side_effect = [
+            make_json_response(
+                [{"digest": "sha256:abc123", "push_time": "2024-01-01T00:00:00Z"}],
+                links={"next": {"url": "https://harbor.example.com/?page=2"}},
+            ),
+            make_json_response(
+                [{"digest": "sha256:def456", "push_time": "2024-01-01T00:00:00Z"}]
+            ),
         ]
-        mock_response_with_data.raise_for_status = MagicMock()
+        images = harbor_client.list_images()
 
-        mock_response_empty = MagicMock()
-        mock_response_empty.json.return_value = []
-        mock_response_empty.raise_for_status = MagicMock()
+        assert [image.identifier for image in images] == [
+            "sha256:abc123",
+            "sha256:def456",
+        ]
+        assert http.get.call_count == 2
 
-        with patch(
-            "requests.get", side_effect=[mock_response_with_data, mock_response_empty]
-        ):
-            images = client.list_images()
+    def test_list_images_without_link_header_reads_while_pages_are_full(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        """A full page with no Link or X-Total-Count header is not the last page."""
+        full_page = [
+            {"digest": f"sha256:{i}", "push_time": "2024-01-01T00:00:00Z"}
+            for i in range(PAGE_SIZE)
+        ]
+        last_page = [{"digest": "sha256:last", "push_time": "2024-01-01T00:00:00Z"}]
+        http.get.side_effect = [
+            make_json_response(full_page),
+            make_json_response(last_page),
+        ]
+        images = harbor_client.list_images()
 
-        assert len(images) == 1
-        assert images[0].tags == []
+        assert len(images) == PAGE_SIZE + 1
+        assert http.get.call_count == 2
 
-    def test_delete_image(self) -> None:
-        client = HarborClient(
-            "https://harbor.example.com", "user", "pass", "proj", "repo"
+    def test_list_images_uses_total_count_header(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        def fake_get(url: str, **kwargs: Any) -> SimpleNamespace:
+            page = kwargs["params"]["page"]
+            return make_json_response(
+                [{"digest": f"sha256:{page}", "push_time": "2024-01-01T00:00:00Z"}],
+                headers={"X-Total-Count": "150"},
+            )
+
+        http.get.side_effect = fake_get
+        images = harbor_client.list_images()
+
+        assert [image.identifier for image in images] == ["sha256:1", "sha256:2"]
+        assert http.get.call_count == 2
+
+    def test_list_images_empty_tags(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        mock_response_with_data = make_json_response(
+            [
+                {
+                    "digest": "sha256:abc123",
+                    "push_time": "2024-01-01T00:00:00Z",
+                    "tags": None,
+                }
+            ]
         )
-        image = ImageVersion("sha256:abc123", ["tag1"], datetime.now(UTC))
-
-        mock_response = MagicMock()
-        mock_response.raise_for_status = MagicMock()
 
-        with patch("requests.delete", return_value=mock_response) as mock_delete:
-            client.delete_image(image)
-            mock_delete.assert_called_once()
-            call_url = mock_delete.call_args[0][0]
-            assert "proj" in call_url
-            assert "repo" in call_url
-            assert "sha256:abc123" in call_url
+        http.get.return_value = mock_response_with_data
+        images = harbor_client.list_images()
 
-    def test_delete_tag(self) -> None:
-        client = HarborClient(
-            "https://harbor.example.com", "user", "pass", "proj", "repo"
-        )
-        image = ImageVersion("sha256:abc123", ["tag1", "tag2"], datetime.now(UTC))
+        assert len(images) == 1
+        assert images[0].tags == ()
 
-        mock_response = MagicMock()
-        mock_response.raise_for_status = MagicMock()
+    def test_delete_tag(
+        self,
+        http: SimpleNamespace,
+        harbor_client: HarborClient,
+        make_json_response: Callable[..., SimpleNamespace],
+    ) -> None:
+        image = ImageVersion("sha256:abc123", ("tag1", "tag2"), _FIXED_TS)
 
-        with patch("requests.delete", return_value=mock_response) as mock_delete:
-            client.delete_tag(image, "tag1")
-            mock_delete.assert_called_once()
-            call_url = mock_delete.call_args[0][0]
-            assert "tag1" in call_url
+        http.delete.return_value = make_json_response()
+        harbor_client.delete_tag(image, "tag1")
+        http.delete.assert_called_once()
+        call_url = http.delete.call_args[0][0]
+        assert "tag1" in call_url
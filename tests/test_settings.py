@@ -1,18 +1,14 @@
 """Tests for settings module."""
 
-import sys
-from pathlib import Path
-
 import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 from container_registry_cleanup.settings import Settings
 
 
 class TestTagPatterns:
-    def setup_method(self) -> None:
-        self.settings = Settings()
+    @pytest.fixture(autouse=True)
+    def _use_settings(self, settings: Settings) -> None:
+        self.settings = settings
 
     def test_test_pattern(self) -> None:
         assert self.settings.compiled_test_pattern.match("pr-123")
@@ -29,6 +25,25 @@ class TestTagPatterns:
         assert not self.settings.compiled_version_pattern.match("v1")
         assert not self.settings.compiled_version_pattern.match("20240101-120000")
 
+    def test_compiled_patterns_are_cached(self) -> None:
+        assert (
+            self.settings.compiled_version_pattern
+            is self.settings.compiled_version_pattern
+        )
+        assert (
+            self.settings.compiled_test_pattern is self.settings.compiled_test_pattern
+        )
+
+    def test_compiled_patterns_follow_assignment(self) -> None:
+        assert self.settings.compiled_version_pattern.match("v1.0.0")
+        settings = self.settings.model_copy()
+        settings.VERSION_PATTERN = r"^release-\d+$"
+        settings.TEST_PATTERN = r"^mr-\d+$"
+        assert settings.compiled_version_pattern.match("release-1")
+        assert not settings.compiled_version_pattern.match("v1.0.0")
+        assert settings.compiled_test_pattern.match("mr-1")
+        assert self.settings.compiled_version_pattern.match("v1.0.0")
+
 
 class TestSettings:
     def test_dry_run_parsing(self, monkeypatch: pytest.MonkeyPatch) -> None: